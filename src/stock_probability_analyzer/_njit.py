@@ -0,0 +1,26 @@
+# OPTIONAL NUMBA SUPPORT
+
+try:
+    from numba import njit as _numba_njit
+    from numba import prange
+
+    HAVE_NUMBA = True
+except ImportError:  # numba is optional
+    _numba_njit = None
+    prange = range  # Serial loops when not compiled
+    HAVE_NUMBA = False
+
+
+def njit(*args, **kwargs):
+    """
+    numba.njit when numba is installed, otherwise a pass-through decorator so
+    modules defining kernels still import. Supports both @njit and @njit(...).
+    Callers should check HAVE_NUMBA before preferring a kernel over NumPy.
+    """
+    if HAVE_NUMBA:
+        return _numba_njit(*args, **kwargs)
+
+    if len(args) == 1 and callable(args[0]) and not kwargs:
+        return args[0]
+
+    return lambda func: func
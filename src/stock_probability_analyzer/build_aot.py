@@ -0,0 +1,40 @@
+# AHEAD-OF-TIME BUILD OF THE STREAK KERNEL
+#
+# Compiles streaks_kernel into the _streaks_aot extension module next to this
+# file, so the first analysis after installing skips numba's JIT compile:
+#
+#     python -m stock_probability_analyzer.build_aot
+#
+# Requires numba (with numba.pycc) and a C compiler at build time only.
+#
+# Closes are always float64, so the exports cover (float64, int16) and
+# (float64, int32), the two streak dtypes utils picks by series length.
+
+from pathlib import Path
+
+from numba.pycc import CC
+
+from stock_probability_analyzer.utils_numba import streaks_kernel
+
+# One export per (closes dtype, streak dtype) pair that utils passes in
+SIGNATURES = {
+    "streaks_f8_i2": "Tuple((i8, i8, i8, b1))(f8[::1], i2[::1], i2[::1])",
+    "streaks_f8_i4": "Tuple((i8, i8, i8, b1))(f8[::1], i4[::1], i4[::1])",
+}
+
+
+def build():
+    """
+    Compile the exports in SIGNATURES into _streaks_aot.
+    """
+    cc = CC("_streaks_aot")
+    cc.output_dir = str(Path(__file__).parent)
+
+    for name, signature in SIGNATURES.items():
+        cc.export(name, signature)(streaks_kernel.py_func)
+
+    cc.compile()
+
+
+if __name__ == "__main__":
+    build()
@@ -0,0 +1,184 @@
+# LOCAL DISK CACHE FOR DOWNLOADED MARKET DATA
+
+import json
+import time
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+CACHE_DIR = Path.home() / ".cache" / "tfcp"
+
+# Length of one bar for each yfinance interval, in seconds
+INTERVAL_SECONDS = {
+    "1m": 60,
+    "2m": 120,
+    "5m": 300,
+    "15m": 900,
+    "30m": 1800,
+    "1h": 3600,
+    "90m": 5400,
+    "1d": 86400,
+    "5d": 5 * 86400,
+    "1wk": 7 * 86400,
+    "1mo": 30 * 86400,
+}
+
+# A cached series is reused without any request for at most one bar, and
+# never for longer than this, since the latest bar keeps changing
+MAX_FRESH_SECONDS = 15 * 60
+
+
+def cache_path(ticker, timeframe, period_str):
+    """
+    Location of the cached close series for a ticker, interval and period.
+    """
+    return CACHE_DIR / timeframe / f"{ticker}_{period_str}.npz"
+
+
+def load_closes(ticker, timeframe, period_str):
+    """
+    Load a cached close series.
+    Returns (timestamps, closes, saved_at) with timestamps as UTC
+    datetime64[ns], or None if nothing usable is cached.
+    """
+    path = cache_path(ticker, timeframe, period_str)
+    if not path.exists():
+        return None
+
+    try:
+        with np.load(path) as cached:
+            return cached["timestamps"], cached["closes"], float(cached["saved_at"])
+    except Exception:
+        # A truncated or stale-format file is treated as a cache miss
+        return None
+
+
+def save_closes(ticker, timeframe, period_str, timestamps, closes):
+    """
+    Persist a close series with its UTC datetime64[ns] timestamps.
+    """
+    path = cache_path(ticker, timeframe, period_str)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez(path, timestamps=timestamps, closes=closes, saved_at=time.time())
+    except OSError:
+        pass  # The cache is best-effort; an unwritable disk just means a refetch
+
+
+def is_fresh(saved_at, timeframe):
+    """
+    Whether a series saved at saved_at can be reused without a new request.
+    """
+    max_age = min(INTERVAL_SECONDS.get(timeframe, 0), MAX_FRESH_SECONDS)
+    return time.time() - saved_at < max_age
+
+
+def history_path(ticker, timeframe, period_str):
+    """
+    Location of the cached single-ticker download used by analyze_ticker.
+    """
+    return CACHE_DIR / "history" / timeframe / f"{ticker}_{period_str}.npz"
+
+
+def history_key(timeframe):
+    """
+    Key under which analyze_ticker may reuse a single-ticker download.
+    Daily and longer bars are reused for the calendar day; intraday bars
+    only within one is_fresh window, since the latest bar keeps changing.
+    """
+    today = date.today().isoformat()
+    if INTERVAL_SECONDS[timeframe] >= INTERVAL_SECONDS["1d"]:
+        return today
+
+    max_age = min(INTERVAL_SECONDS[timeframe], MAX_FRESH_SECONDS)
+    return f"{today}T{int(time.time() // max_age)}"
+
+
+def load_history(ticker, timeframe, period_str, reuse_key):
+    """
+    Load a single-ticker download saved under reuse_key (see history_key).
+    Returns (closes, first_timestamp, last_timestamp), or None if nothing
+    usable is cached.
+    """
+    path = history_path(ticker, timeframe, period_str)
+    if not path.exists():
+        return None
+
+    try:
+        with np.load(path) as cached:
+            if str(cached["reuse_key"]) != reuse_key:
+                return None
+            intraday = INTERVAL_SECONDS[timeframe] < INTERVAL_SECONDS["1d"]
+            if intraday and not is_fresh(float(cached["saved_at"]), timeframe):
+                return None
+            closes = cached["closes"]
+            if closes.dtype != np.float64:  # Saved by an older, float32 version
+                return None
+            first_timestamp = pd.Timestamp(str(cached["first_timestamp"]))
+            last_timestamp = pd.Timestamp(str(cached["last_timestamp"]))
+    except Exception:
+        # Includes files from older versions without reuse_key/saved_at
+        return None
+
+    return closes, first_timestamp, last_timestamp
+
+
+def save_history(
+    ticker, timeframe, period_str, reuse_key, closes, first_timestamp, last_timestamp
+):
+    """
+    Persist a single-ticker download under reuse_key (see history_key).
+    The timestamps keep their UTC offset, so they print in exchange time.
+    1-minute data changes too quickly to be worth keeping, so it is skipped,
+    as in the scanner.
+    """
+    if timeframe == "1m":
+        return
+
+    path = history_path(ticker, timeframe, period_str)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez(
+            path,
+            closes=closes,
+            first_timestamp=first_timestamp.isoformat(),
+            last_timestamp=last_timestamp.isoformat(),
+            reuse_key=reuse_key,
+            saved_at=time.time(),
+        )
+    except OSError:
+        pass  # The cache is best-effort
+
+
+def load_market_caps():
+    """
+    Load today's cached market caps as {ticker: market_cap}.
+    Caps from earlier days are discarded.
+    """
+    path = CACHE_DIR / "market_caps.json"
+    try:
+        with open(path) as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+    if cached.get("date") != date.today().isoformat():
+        return {}
+
+    return cached.get("market_caps", {})
+
+
+def save_market_caps(market_caps):
+    """
+    Persist {ticker: market_cap} as today's market-cap sidecar file.
+    Caps of 0 mark failed lookups and are left out, so they are retried.
+    """
+    market_caps = {ticker: cap for ticker, cap in market_caps.items() if cap > 0}
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        with open(CACHE_DIR / "market_caps.json", "w") as f:
+            json.dump({"date": date.today().isoformat(), "market_caps": market_caps}, f)
+    except OSError:
+        pass  # The cache is best-effort
@@ -1,42 +1,247 @@
 #!/usr/bin/env python
 # MAIN FILE
 
-from collections import Counter
+import functools
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 
+import numpy as np
 import yfinance as yf
 
+from stock_probability_analyzer.cache import history_key, load_history, save_history
 from stock_probability_analyzer.scanner import scanner_mode
 from stock_probability_analyzer.utils import (
+    analyze_closes,
+    build_histogram,
+    build_survival,
+    build_transition_matrix,
     calculate_streak_probabilities,
-    get_consecutive_streaks,
-    get_current_streak,
+    estimate_transition_matrix,
+    get_period_string,
+    warm_up,
 )
 
+StreakAnalysis = namedtuple(
+    "StreakAnalysis",
+    [
+        "up_streaks",
+        "down_streaks",
+        "up_hist",
+        "down_hist",
+        "up_surv",
+        "down_surv",
+        "current_length",
+        "current_direction",
+        "state",
+        "next_matrix",
+        "after_matrix",
+        "markov_matrix",
+    ],
+)
+
+# yfinance intervals accepted by get_timeframe_selection
+VALID_TIMEFRAMES = frozenset(
+    ["1m", "2m", "5m", "15m", "30m", "1h", "90m", "1d", "5d", "1wk", "1mo"]
+)
+
+# Common spellings mapped to their yfinance interval
+TIMEFRAME_ALIASES = {
+    "1min": "1m",
+    "1minute": "1m",
+    "1hour": "1h",
+    "1hr": "1h",
+    "1day": "1d",
+    "daily": "1d",
+    "d": "1d",
+    "1week": "1wk",
+    "weekly": "1wk",
+    "w": "1wk",
+    "1month": "1mo",
+    "monthly": "1mo",
+}
+
+# yfinance history limits for each timeframe
+TIMEFRAME_LIMITATIONS = {
+    "1m": {
+        "max_days": 7,
+        "warning": "yfinance limits 1-minute data to last 7 days",
+    },
+    "2m": {
+        "max_days": 60,
+        "warning": "yfinance limits 2-minute data to last 60 days",
+    },
+    "5m": {
+        "max_days": 60,
+        "warning": "yfinance limits 5-minute data to last 60 days",
+    },
+    "15m": {
+        "max_days": 60,
+        "warning": "yfinance limits 15-minute data to last 60 days",
+    },
+    "30m": {
+        "max_days": 60,
+        "warning": "yfinance limits 30-minute data to last 60 days",
+    },
+    "1h": {
+        "max_days": 730,
+        "warning": "yfinance limits hourly data to last 2 years",
+    },
+    "90m": {
+        "max_days": 60,
+        "warning": "yfinance limits 90-minute data to last 60 days",
+    },
+    "1d": {"max_days": None, "warning": None},  # No practical limit for daily
+    "5d": {"max_days": None, "warning": None},
+    "1wk": {"max_days": None, "warning": None},
+    "1mo": {"max_days": None, "warning": None},
+}
+
+
+# Non-empty downloads memoized by download_history, oldest first
+_HISTORY_CACHE = {}
+_HISTORY_CACHE_SIZE = 32
+
+
+def download_history(ticker, timeframe, period_str, reuse_key):
+    """
+    Download closing prices for a ticker, memoized under reuse_key.
+    reuse_key (from cache.history_key) is only part of the cache key: it
+    changes daily for daily and longer bars and every few minutes for
+    intraday ones, so repeat analyses skip the network round-trip until the
+    latest bar may have moved. The download is also kept on disk (see
+    cache.py), so a new session started meanwhile reuses it too. Empty
+    downloads are never memoized, so a transient failure is retried on the
+    next call.
+
+    Returns (closes, first_timestamp, last_timestamp). Only the Close column
+    is kept, as a read-only float64 array, so the rest of the OHLCV frame is
+    released as soon as this returns.
+    """
+    key = (ticker, timeframe, period_str, reuse_key)
+    if key in _HISTORY_CACHE:
+        return _HISTORY_CACHE[key]
+
+    history = load_history(ticker, timeframe, period_str, reuse_key)
+    if history is None:
+        data = yf.Ticker(ticker).history(period=period_str, interval=timeframe)
+        if data.empty:
+            return np.empty(0), None, None
+
+        closes = data["Close"].to_numpy(dtype=np.float64)
+        history = closes, data.index[0], data.index[-1]
+        save_history(ticker, timeframe, period_str, reuse_key, *history)
+
+    history[0].flags.writeable = False
+    _HISTORY_CACHE[key] = history
+    if len(_HISTORY_CACHE) > _HISTORY_CACHE_SIZE:
+        _HISTORY_CACHE.pop(next(iter(_HISTORY_CACHE)), None)
+
+    return history
+
+
+@functools.lru_cache(maxsize=128)
+def compute_streak_analysis(ticker, timeframe, period_str, reuse_key):
+    """
+    Run the streak analysis on a ticker's downloaded history, memoized under
+    the same reuse_key as download_history. Returns a StreakAnalysis holding
+    every number that analyze_ticker prints; printing stays in analyze_ticker
+    so a repeat analysis of the same ticker skips all the number crunching.
+    """
+    closes, _, _ = download_history(ticker, timeframe, period_str, reuse_key)
+    up_streaks, down_streaks, current_length, current_direction = analyze_closes(closes)
+
+    # One histogram per direction feeds both the survival arrays and the
+    # streak distribution printed by analyze_ticker
+    up_hist = build_histogram(up_streaks)
+    down_hist = build_histogram(down_streaks)
+    up_surv = build_survival(up_streaks, up_hist)
+    down_surv = build_survival(down_streaks, down_hist)
+
+    # Model the next closes as a 2-state Markov chain over {up, down}.
+    # The current state's row uses the live streak length; a reversal
+    # starts a fresh 1-period streak in the other direction.
+    is_up = current_direction == "up"
+    state = np.array([1.0, 0.0]) if is_up else np.array([0.0, 1.0])
+
+    next_matrix = build_transition_matrix(
+        up_surv,
+        down_surv,
+        current_length if is_up else 1,
+        1 if is_up else current_length,
+    )
+
+    # After the next close the current streak has either been extended
+    # to current_length + 1 or broken by a new 1-period streak
+    after_matrix = build_transition_matrix(
+        up_surv,
+        down_surv,
+        current_length + 1 if is_up else 1,
+        1 if is_up else current_length + 1,
+    )
+
+    # Memoryless baseline: plain up/down transition counts, ignoring how
+    # long the current streak has run
+    markov_matrix = estimate_transition_matrix(
+        up_streaks, down_streaks, current_direction
+    )
+
+    return StreakAnalysis(
+        up_streaks,
+        down_streaks,
+        up_hist,
+        down_hist,
+        up_surv,
+        down_surv,
+        current_length,
+        current_direction,
+        state,
+        next_matrix,
+        after_matrix,
+        markov_matrix,
+    )
+
+
+def prefetch_histories(tickers, timeframe, days, max_workers=8):
+    """
+    Download history for several tickers concurrently into the download cache.
+    yfinance spends its time waiting on HTTPS responses, so threads overlap
+    the network latency; the analysis itself still runs sequentially.
+    """
+    period_str = get_period_string(days)
+    reuse_key = history_key(timeframe)
+
+    def fetch(ticker):
+        try:
+            download_history(ticker, timeframe, period_str, reuse_key)
+        except Exception:
+            # analyze_ticker retries the download and reports the error
+            pass
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        list(executor.map(fetch, tickers))
+
 
 def calculate_break_probabilities(
-    up_streaks, down_streaks, current_length, current_direction
+    up_surv, down_surv, current_length, current_direction
 ):
     """
     Calculate probabilities after breaking the current streak.
+    Takes the survival arrays from build_survival and returns the chance the
+    new streak lasts at least 2 periods versus reversing straight away.
     """
     if current_direction == "up":
         # If we break an up streak, we start a down streak
-        relevant_streaks = down_streaks
+        relevant_surv = down_surv
     else:
         # If we break a down streak, we start an up streak
-        relevant_streaks = up_streaks
+        relevant_surv = up_surv
 
-    if not relevant_streaks:
+    if len(relevant_surv) == 0:
         return 50.0, 50.0  # Default to 50/50 if no data
 
-    # Probability of at least 1 day in the new direction
-    continue_new_direction = sum(1 for streak in relevant_streaks if streak >= 1)
-    total_breaks = len(relevant_streaks)
-
-    if total_breaks == 0:
-        return 50.0, 50.0
-
-    continue_prob = (continue_new_direction / total_breaks) * 100
+    # Every streak lasts at least 1 period, so compare surv[2] with surv[1]
+    continue_prob = calculate_streak_probabilities(relevant_surv, 1)
     reverse_prob = 100 - continue_prob
 
     return continue_prob, reverse_prob
@@ -46,21 +251,6 @@ def get_timeframe_selection():
     """
     Prompt user for timeframe selection and return appropriate yfinance interval.
     """
-    timeframes = {
-        "1": ("1m", "1 minute"),
-        "2": ("2m", "2 minutes"),
-        "5": ("5m", "5 minutes"),
-        "15": ("15m", "15 minutes"),
-        "30": ("30m", "30 minutes"),
-        "60": ("1h", "1 hour"),
-        "90": ("90m", "90 minutes"),
-        "1h": ("1h", "1 hour"),
-        "1d": ("1d", "1 day"),
-        "5d": ("5d", "5 days"),
-        "1wk": ("1wk", "1 week"),
-        "1mo": ("1mo", "1 month"),
-    }
-
     print("\nAvailable timeframes:")
     print("1m, 2m, 5m, 15m, 30m, 1h, 1d, 5d, 1wk, 1mo")
     print(
@@ -71,30 +261,9 @@ def get_timeframe_selection():
         timeframe = input("Enter desired timeframe: ").strip().lower()
 
         # Convert some common inputs
-        if timeframe in ["1min", "1minute"]:
-            timeframe = "1m"
-        elif timeframe in ["1hour", "1hr"]:
-            timeframe = "1h"
-        elif timeframe in ["1day", "daily", "d"]:
-            timeframe = "1d"
-        elif timeframe in ["1week", "weekly", "w"]:
-            timeframe = "1wk"
-        elif timeframe in ["1month", "monthly"]:
-            timeframe = "1mo"
-
-        if timeframe in [
-            "1m",
-            "2m",
-            "5m",
-            "15m",
-            "30m",
-            "1h",
-            "90m",
-            "1d",
-            "5d",
-            "1wk",
-            "1mo",
-        ]:
+        timeframe = TIMEFRAME_ALIASES.get(timeframe, timeframe)
+
+        if timeframe in VALID_TIMEFRAMES:
             return timeframe
         else:
             print(
@@ -106,43 +275,9 @@ def get_days_selection(timeframe):
     """
     Prompt user for number of days and validate based on timeframe limitations.
     """
-    # Define limitations for different timeframes
-    limitations = {
-        "1m": {
-            "max_days": 7,
-            "warning": "yfinance limits 1-minute data to last 7 days",
-        },
-        "2m": {
-            "max_days": 60,
-            "warning": "yfinance limits 2-minute data to last 60 days",
-        },
-        "5m": {
-            "max_days": 60,
-            "warning": "yfinance limits 5-minute data to last 60 days",
-        },
-        "15m": {
-            "max_days": 60,
-            "warning": "yfinance limits 15-minute data to last 60 days",
-        },
-        "30m": {
-            "max_days": 60,
-            "warning": "yfinance limits 30-minute data to last 60 days",
-        },
-        "1h": {
-            "max_days": 730,
-            "warning": "yfinance limits hourly data to last 2 years",
-        },
-        "90m": {
-            "max_days": 60,
-            "warning": "yfinance limits 90-minute data to last 60 days",
-        },
-        "1d": {"max_days": None, "warning": None},  # No practical limit for daily
-        "5d": {"max_days": None, "warning": None},
-        "1wk": {"max_days": None, "warning": None},
-        "1mo": {"max_days": None, "warning": None},
-    }
-
-    limit_info = limitations.get(timeframe, {"max_days": None, "warning": None})
+    limit_info = TIMEFRAME_LIMITATIONS.get(
+        timeframe, {"max_days": None, "warning": None}
+    )
 
     print(f"\nSelected timeframe: {timeframe}")
     if limit_info["warning"]:
@@ -190,25 +325,19 @@ def analyze_ticker(ticker, timeframe, days):
     print(f"{'='*60}")
 
     try:
-        # Download data
-        stock = yf.Ticker(ticker)
-
         # Calculate period string for yfinance
-        if days <= 5:
-            period_str = f"{days}d"
-        elif days <= 365:
-            period_str = f"{days}d"
-        else:
-            # For longer periods, use years
-            years = max(1, days // 365)
-            period_str = f"{years}y"
+        period_str = get_period_string(days)
+        # One key for the download and the analysis, so both see the same data
+        reuse_key = history_key(timeframe)
 
         print(f"Downloading {days} days of {timeframe} data for {ticker.upper()}...")
 
-        # Download with specified interval
-        data = stock.history(period=period_str, interval=timeframe)
+        # Download with specified interval (reused if fetched recently)
+        closes, first_timestamp, last_timestamp = download_history(
+            ticker.upper(), timeframe, period_str, reuse_key
+        )
 
-        if data.empty:
+        if len(closes) == 0:
             print(f"Error: No data returned for {ticker} with {timeframe} timeframe")
             print("This might be due to:")
             print("- Invalid ticker symbol")
@@ -216,51 +345,48 @@ def analyze_ticker(ticker, timeframe, days):
             print("- Market hours (intraday data only available during trading hours)")
             return
 
-        if len(data) < 10:
+        if len(closes) < 10:
             print(
-                f"Warning: Only {len(data)} data points loaded. Need at least 10 for meaningful analysis."
+                f"Warning: Only {len(closes)} data points loaded. Need at least 10 for meaningful analysis."
             )
             return
 
-        closes = data["Close"].values
         print(f"Successfully loaded {len(closes)} data points")
 
         # Show data range
         start_date = (
-            data.index[0].strftime("%Y-%m-%d %H:%M")
+            first_timestamp.strftime("%Y-%m-%d %H:%M")
             if timeframe != "1d"
-            else data.index[0].strftime("%Y-%m-%d")
+            else first_timestamp.strftime("%Y-%m-%d")
         )
         end_date = (
-            data.index[-1].strftime("%Y-%m-%d %H:%M")
+            last_timestamp.strftime("%Y-%m-%d %H:%M")
             if timeframe != "1d"
-            else data.index[-1].strftime("%Y-%m-%d")
+            else last_timestamp.strftime("%Y-%m-%d")
         )
         print(f"Data range: {start_date} to {end_date}")
 
-        # Get consecutive streaks
-        up_streaks, down_streaks = get_consecutive_streaks(closes)
+        # Get consecutive streaks and the current streak (reused if
+        # computed recently)
+        analysis = compute_streak_analysis(
+            ticker.upper(), timeframe, period_str, reuse_key
+        )
 
         print("\nHistorical Streak Analysis:")
-        print(f"Total up streaks found: {len(up_streaks)}")
-        print(f"Total down streaks found: {len(down_streaks)}")
-
-        if up_streaks:
-            print(f"Longest up streak: {max(up_streaks)} periods")
-            print(f"Average up streak: {sum(up_streaks)/len(up_streaks):.1f} periods")
+        print(f"Total up streaks found: {analysis.up_streaks.size}")
+        print(f"Total down streaks found: {analysis.down_streaks.size}")
 
-        if down_streaks:
-            print(f"Longest down streak: {max(down_streaks)} periods")
-            print(
-                f"Average down streak: {sum(down_streaks)/len(down_streaks):.1f} periods"
-            )
+        if analysis.up_streaks.size:
+            print(f"Longest up streak: {int(analysis.up_streaks.max())} periods")
+            print(f"Average up streak: {analysis.up_streaks.mean():.1f} periods")
 
-        # Get current streak
-        current_length, current_direction = get_current_streak(closes)
+        if analysis.down_streaks.size:
+            print(f"Longest down streak: {int(analysis.down_streaks.max())} periods")
+            print(f"Average down streak: {analysis.down_streaks.mean():.1f} periods")
 
         print("\nCurrent Status:")
         print(
-            f"Current streak: {current_length} consecutive {current_direction} period(s)"
+            f"Current streak: {analysis.current_length} consecutive {analysis.current_direction} period(s)"
         )
         print(f"Last close: ${closes[-1]:.2f}")
 
@@ -274,29 +400,19 @@ def analyze_ticker(ticker, timeframe, days):
         print("NEXT CLOSE PROBABILITIES")
         print(f"{'='*60}")
 
-        if current_direction == "up":
-            extend_prob = calculate_streak_probabilities(up_streaks, current_length)
-            break_prob = 100 - extend_prob
+        current_idx = 0 if analysis.current_direction == "up" else 1
+        next_probs = analysis.state @ analysis.next_matrix * 100
+        next_upside_prob, next_downside_prob = next_probs
 
-            print(
-                f"Probability of extending up streak to {current_length + 1} periods: {extend_prob:.1f}%"
-            )
-            print(f"Probability of breaking up streak: {break_prob:.1f}%")
-
-            next_upside_prob = extend_prob
-            next_downside_prob = break_prob
-
-        else:  # current_direction == 'down'
-            extend_prob = calculate_streak_probabilities(down_streaks, current_length)
-            break_prob = 100 - extend_prob
+        extend_prob = next_probs[current_idx]
+        break_prob = 100 - extend_prob
 
-            print(
-                f"Probability of extending down streak to {current_length + 1} periods: {extend_prob:.1f}%"
-            )
-            print(f"Probability of breaking down streak: {break_prob:.1f}%")
-
-            next_upside_prob = break_prob
-            next_downside_prob = extend_prob
+        print(
+            f"Probability of extending {analysis.current_direction} streak to {analysis.current_length + 1} periods: {extend_prob:.1f}%"
+        )
+        print(
+            f"Probability of breaking {analysis.current_direction} streak: {break_prob:.1f}%"
+        )
 
         print("\nSUMMARY - Next Period Close:")
         print(f"Upside probability: {next_upside_prob:.1f}%")
@@ -307,33 +423,11 @@ def analyze_ticker(ticker, timeframe, days):
         print("PERIOD AFTER NEXT PROBABILITIES")
         print(f"{'='*60}")
 
-        # Scenario 1: Next close is up (extending current streak)
-        if current_direction == "up":
-            # We would have current_length + 1 consecutive up periods
-            # Now calculate probability of extending to current_length + 2
-            extended_length = current_length + 1
-            scenario1_up = calculate_streak_probabilities(up_streaks, extended_length)
-            scenario1_down = 100 - scenario1_up
-        else:
-            # We're breaking a down streak with an up period
-            # Now calculate probability of extending this new up streak to 2 periods
-            scenario1_up = calculate_streak_probabilities(up_streaks, 1)
-            scenario1_down = 100 - scenario1_up
-
-        # Scenario 2: Next close is down (extending current streak if down, or breaking if up)
-        if current_direction == "down":
-            # We would have current_length + 1 consecutive down periods
-            # Now calculate probability of extending to current_length + 2
-            extended_length = current_length + 1
-            scenario2_down = calculate_streak_probabilities(
-                down_streaks, extended_length
-            )
-            scenario2_up = 100 - scenario2_down
-        else:
-            # We're breaking an up streak with a down period
-            # Now calculate probability of extending this new down streak to 2 periods
-            scenario2_down = calculate_streak_probabilities(down_streaks, 1)
-            scenario2_up = 100 - scenario2_down
+        scenario1_up, scenario1_down = analysis.after_matrix[0] * 100
+        scenario2_up, scenario2_down = analysis.after_matrix[1] * 100
+        after_up, after_down = (
+            analysis.state @ analysis.next_matrix @ analysis.after_matrix * 100
+        )
 
         print("If next close is ABOVE current:")
         print(f"  └─ Period after: {scenario1_up:.1f}% up, {scenario1_down:.1f}% down")
@@ -341,24 +435,42 @@ def analyze_ticker(ticker, timeframe, days):
         print("If next close is BELOW current:")
         print(f"  └─ Period after: {scenario2_up:.1f}% up, {scenario2_down:.1f}% down")
 
+        print(f"Overall period after next: {after_up:.1f}% up, {after_down:.1f}% down")
+
+        # Memoryless baseline from the plain up/down transition counts
+        baseline_next = analysis.state @ analysis.markov_matrix * 100
+        baseline_after = (
+            analysis.state @ analysis.markov_matrix @ analysis.markov_matrix * 100
+        )
+
+        print("\nMemoryless baseline (first-order Markov chain):")
+        print(
+            f"  Next period: {baseline_next[0]:.1f}% up, {baseline_next[1]:.1f}% down"
+        )
+        print(
+            f"  Period after next: {baseline_after[0]:.1f}% up, {baseline_after[1]:.1f}% down"
+        )
+
         # Show some streak distribution for context
         print(f"\n{'='*60}")
         print("STREAK DISTRIBUTION (Historical)")
         print(f"{'='*60}")
 
-        up_counter = Counter(up_streaks)
-        down_counter = Counter(down_streaks)
+        # The histograms are indexed by length, so their nonzero entries are
+        # the distinct lengths in ascending order; show the 10 shortest
+        up_lengths = np.flatnonzero(analysis.up_hist)[:10]
+        down_lengths = np.flatnonzero(analysis.down_hist)[:10]
+        up_counts = analysis.up_hist[up_lengths]
+        down_counts = analysis.down_hist[down_lengths]
+        up_pct = up_counts / analysis.up_streaks.size * 100
+        down_pct = down_counts / analysis.down_streaks.size * 100
 
         print("Up streaks:")
-        for length in sorted(up_counter.keys())[:10]:  # Show first 10
-            count = up_counter[length]
-            percentage = (count / len(up_streaks)) * 100
+        for length, count, percentage in zip(up_lengths, up_counts, up_pct):
             print(f"  {length} period(s): {count} times ({percentage:.1f}%)")
 
         print("\nDown streaks:")
-        for length in sorted(down_counter.keys())[:10]:  # Show first 10
-            count = down_counter[length]
-            percentage = (count / len(down_streaks)) * 100
+        for length, count, percentage in zip(down_lengths, down_counts, down_pct):
             print(f"  {length} period(s): {count} times ({percentage:.1f}%)")
 
     except Exception as e:
@@ -373,13 +485,22 @@ def main():
     print("This program analyzes the probability of consecutive up/down moves")
     print("based on historical data with customizable timeframes and periods.\n")
 
+    # Load the compiled kernels while the user answers the prompts
+    threading.Thread(target=warm_up, daemon=True).start()
+
     while True:
         # Get user inputs
         ticker = (
-            input("Enter a stock ticker symbol or type 'scanner': ").strip().upper()
+            input(
+                "Enter a stock ticker symbol (or several, comma-separated) "
+                "or type 'scanner': "
+            )
+            .strip()
+            .upper()
         )
+        tickers = ticker.replace(",", " ").split()
 
-        if not ticker:
+        if not tickers:
             print("Please enter a valid ticker symbol.")
             continue
 
@@ -391,9 +512,14 @@ def main():
 
         if ticker == "SCANNER":
             scanner_mode(timeframe, days)
+        elif len(tickers) > 1:
+            # Batch mode: download everything concurrently, then analyze
+            prefetch_histories(tickers, timeframe, days)
+            for batch_ticker in tickers:
+                analyze_ticker(batch_ticker, timeframe, days)
         else:
             # Analyze the ticker
-            analyze_ticker(ticker, timeframe, days)
+            analyze_ticker(tickers[0], timeframe, days)
 
         print(f"\n{'='*60}")
         continue_analysis = (
@@ -1,28 +1,59 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
 
+import numpy as np
+import pandas as pd
 import tqdm
 import yfinance as yf
 
+from stock_probability_analyzer.cache import (
+    is_fresh,
+    load_closes,
+    load_market_caps,
+    save_closes,
+    save_market_caps,
+)
 from stock_probability_analyzer.utils import (
-    calculate_streak_probabilities,
-    get_consecutive_streaks,
-    get_current_streak,
+    get_period_string,
+    scan_streak_probabilities,
+)
+
+# Sort keys for the scan results table and top-10 lists
+RANKING_DTYPE = np.dtype(
+    [
+        ("ticker", "U16"),
+        ("market_cap", "f8"),
+        ("upside_probability", "f8"),
+        ("downside_probability", "f8"),
+    ]
 )
 
 
+# Ticker list read by get_sp500_tickers; stays None until a read succeeds
+_SP500_TICKERS = None
+
+
 def get_sp500_tickers():
     """
     Get S&P 500 ticker symbols from Wikipedia.
+    The list is read once per process and returned as a tuple, so repeated
+    scans in the same session share it. The fallback list is not kept, so a
+    failed read is retried by the next scan.
     """
+    global _SP500_TICKERS
+    if _SP500_TICKERS is not None:
+        return _SP500_TICKERS
+
     try:
         # Read S&P 500 list from text file
         with open("data/stocks.txt") as f:
-            tickers = [line.strip() for line in f if line.strip()]
+            _SP500_TICKERS = tuple(line.strip() for line in f if line.strip())
 
-        return tickers
+        return _SP500_TICKERS
     except Exception as e:
         print(f"Error loading S&P 500 list: {e}")
         # Fallback to a smaller list of major stocks
-        return [
+        return (
             "SPY",
             "DJT",
             "QQQ",
@@ -90,73 +121,230 @@ def get_sp500_tickers():
             "RTX",
             "SNOW",
             "PANW",
-	    "PLTR",
-        ]
+            "PLTR",
+        )
 
 
-def analyze_ticker_for_scanner(ticker, timeframe, days, min_data_points=50):
+def download_close_series(tickers, chunk_size=50, **download_kwargs):
     """
-    Lightweight version of analyze_ticker for scanner use.
-    Returns probability data or None if analysis fails.
+    Run batched yf.download calls, chunk_size symbols per request, and split
+    the result per ticker. download_kwargs are passed on to yf.download.
+    Returns {ticker: Close series}; tickers without data are left out.
+
+    Closes are always adjusted, like Ticker.history; older yfinance releases
+    default yf.download to unadjusted prices.
     """
-    try:
-        # Download data
-        stock = yf.Ticker(ticker)
-
-        # Calculate period string for yfinance
-        if days <= 5:
-            period_str = f"{days}d"
-        elif days <= 365:
-            period_str = f"{days}d"
+    series_by_ticker = {}
+    chunks = [
+        list(tickers[i : i + chunk_size]) for i in range(0, len(tickers), chunk_size)
+    ]
+
+    for chunk in tqdm.tqdm(chunks, desc="Downloading", ncols=80):
+        try:
+            data = yf.download(
+                chunk,
+                group_by="ticker",
+                auto_adjust=True,
+                threads=True,
+                progress=False,
+                **download_kwargs,
+            )
+        except Exception:
+            continue
+
+        if data is None or data.empty:
+            continue
+
+        # Keep only the Close column of every ticker, so the per-ticker
+        # lookups below slice a single-level frame
+        if isinstance(data.columns, pd.MultiIndex):
+            try:
+                close_frame = data.xs("Close", axis=1, level=1)
+            except KeyError:
+                continue
+        elif len(chunk) == 1 and "Close" in data.columns:
+            # Some yfinance versions return flat columns for a single symbol
+            close_frame = data[["Close"]].set_axis(chunk, axis=1)
         else:
-            years = max(1, days // 365)
-            period_str = f"{years}y"
-
-        # Download with specified interval
-        data = stock.history(period=period_str, interval=timeframe)
-
-        if data.empty or len(data) < min_data_points:
-            return None
-
-        closes = data["Close"].values
-
-        # Get consecutive streaks
-        up_streaks, down_streaks = get_consecutive_streaks(closes)
-
-        if not up_streaks or not down_streaks:
-            return None
-
-        # Get current streak
-        current_length, current_direction = get_current_streak(closes)
-
-        # Calculate probabilities for next close
-        if current_direction == "up":
-            extend_prob = calculate_streak_probabilities(up_streaks, current_length)
-            next_upside_prob = extend_prob
-            next_downside_prob = 100 - extend_prob
-        else:  # current_direction == 'down'
-            extend_prob = calculate_streak_probabilities(down_streaks, current_length)
-            next_upside_prob = 100 - extend_prob
-            next_downside_prob = extend_prob
-
-        # Get basic stock info
-        info = stock.info
-        market_cap = info.get("marketCap", 0) if info else 0
-        current_price = closes[-1]
-
-        return {
-            "ticker": ticker,
-            "upside_probability": next_upside_prob,
-            "downside_probability": next_downside_prob,
-            "current_streak": current_length,
-            "streak_direction": current_direction,
-            "current_price": current_price,
-            "market_cap": market_cap,
-            "data_points": len(closes),
-        }
+            continue
+
+        for ticker in chunk:
+            try:
+                # Tickers in one batch share an index, so drop the gaps
+                closes = close_frame[ticker].dropna()
+            except KeyError:
+                continue
+
+            if len(closes):
+                series_by_ticker[ticker] = closes
 
-    except Exception:
-        return None
+    return series_by_ticker
+
+
+def utc_timestamps(index):
+    """
+    Convert a DatetimeIndex into naive UTC datetime64[ns] values.
+    """
+    if index.tz is not None:
+        index = index.tz_convert("UTC").tz_localize(None)
+    return index.to_numpy(dtype="datetime64[ns]")
+
+
+def fetch_all_closes(tickers, timeframe, days, chunk_size=50):
+    """
+    Download closing prices for many tickers with batched yf.download calls.
+    Returns {ticker: closes array}; tickers without data are left out.
+
+    Series are cached on disk (see cache.py), keyed by ticker, timeframe and
+    period, so a scan over a different window never reuses another window's
+    series. Recently saved entries are reused as-is, entries saved earlier
+    today only download the bars since their last cached bar, and older
+    entries are refetched in full because adjusted closes are restated after
+    splits and dividends. 1-minute data only covers a few days, so it is
+    never cached.
+    """
+    period_str = get_period_string(days)
+
+    use_cache = timeframe != "1m"
+    today = date.today()
+    closes_by_ticker = {}
+    stale = {}
+
+    if use_cache:
+        for ticker in tickers:
+            cached = load_closes(ticker, timeframe, period_str)
+            if cached is None:
+                continue
+
+            timestamps, closes, saved_at = cached
+            if is_fresh(saved_at, timeframe):
+                closes_by_ticker[ticker] = closes
+            elif date.fromtimestamp(saved_at) == today:
+                stale[ticker] = (timestamps, closes)
+
+    # Tickers with nothing usable on disk get the full history
+    missing = [t for t in tickers if t not in closes_by_ticker and t not in stale]
+    downloaded = download_close_series(
+        missing, chunk_size, period=period_str, interval=timeframe
+    )
+    for ticker, series in downloaded.items():
+        closes = series.to_numpy(dtype=np.float64, copy=False)
+        closes_by_ticker[ticker] = closes
+        if use_cache:
+            save_closes(
+                ticker, timeframe, period_str, utc_timestamps(series.index), closes
+            )
+
+    # Stale tickers only need the bars since their last cached one (which is
+    # refetched, as it may have been incomplete); group them by that bar
+    by_last_bar = {}
+    for ticker, (timestamps, _) in stale.items():
+        by_last_bar.setdefault(timestamps[-1], []).append(ticker)
+
+    for last_bar, group in by_last_bar.items():
+        updates = download_close_series(
+            group,
+            chunk_size,
+            start=pd.Timestamp(last_bar, tz="UTC"),
+            interval=timeframe,
+        )
+        for ticker in group:
+            timestamps, closes = stale[ticker]
+            update = updates.get(ticker)
+            if update is not None:
+                new_timestamps = utc_timestamps(update.index)
+                keep = timestamps < new_timestamps[0]
+                timestamps = np.concatenate((timestamps[keep], new_timestamps))
+                closes = np.concatenate(
+                    (closes[keep], update.to_numpy(dtype=np.float64, copy=False))
+                )
+                save_closes(ticker, timeframe, period_str, timestamps, closes)
+
+            closes_by_ticker[ticker] = closes
+
+    return closes_by_ticker
+
+
+def fetch_market_caps(tickers):
+    """
+    Look up market caps for several tickers through Ticker.fast_info, which
+    reads a single quote endpoint instead of scraping the full info page.
+    Returns {ticker: market_cap}, with 0 where it is unavailable.
+    """
+    if not tickers:
+        return {}
+
+    batch = yf.Tickers(" ".join(tickers))
+
+    def lookup(ticker):
+        try:
+            market_cap = batch.tickers[ticker.upper()].fast_info.market_cap
+            return market_cap if market_cap and market_cap > 0 else 0
+        except Exception:
+            return 0
+
+    # Each lookup is still one HTTP request, so run them on a thread pool
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        return dict(zip(tickers, executor.map(lookup, tickers)))
+
+
+def scanner_result(ticker, closes, current_length, current_direction, extend_prob):
+    """
+    Assemble the scanner's result dict for one ticker.
+    The market cap is left as None for the caller to fill in.
+    """
+    # Calculate probabilities for next close
+    if current_direction == "up":
+        next_upside_prob = extend_prob
+        next_downside_prob = 100 - extend_prob
+    else:  # current_direction == 'down'
+        next_upside_prob = 100 - extend_prob
+        next_downside_prob = extend_prob
+
+    return {
+        "ticker": ticker,
+        "upside_probability": next_upside_prob,
+        "downside_probability": next_downside_prob,
+        "current_streak": current_length,
+        "streak_direction": current_direction,
+        "current_price": closes[-1],
+        "market_cap": None,
+        "data_points": len(closes),
+    }
+
+
+def scan_closes(tickers, closes_by_ticker, min_data_points=50):
+    """
+    Compute scanner probabilities for every ticker of a scan at once.
+    Returns a list aligned with tickers holding each result dict, or None
+    where a ticker has no data or not enough history.
+
+    All tickers are analyzed together by scan_streak_probabilities, which
+    spreads them over every core when numba is installed.
+    """
+    analyses = [None] * len(tickers)
+    scanned = [
+        (i, ticker, closes_by_ticker[ticker])
+        for i, ticker in enumerate(tickers)
+        if ticker in closes_by_ticker
+        and len(closes_by_ticker[ticker]) >= min_data_points
+    ]
+
+    current_lengths, current_is_up, extend_probs, has_both = scan_streak_probabilities(
+        [closes for _, _, closes in scanned]
+    )
+
+    for j, (i, ticker, closes) in enumerate(scanned):
+        if has_both[j]:
+            analyses[i] = scanner_result(
+                ticker,
+                closes,
+                int(current_lengths[j]),
+                "up" if current_is_up[j] else "down",
+                float(extend_probs[j]),
+            )
+
+    return analyses
 
 
 def scanner_mode(timeframe, days):
@@ -202,26 +390,17 @@ def scanner_mode(timeframe, days):
     tickers = get_sp500_tickers()
     print(f"Found {len(tickers)} tickers to scan")
 
+    print("\nScanning stocks... (this may take a few minutes)")
+    closes_by_ticker = fetch_all_closes(tickers, timeframe, days)
+
+    analyses = scan_closes(tickers, closes_by_ticker)
+
     # Initialize results storage
     results = []
     successful_scans = 0
     failed_scans = 0
 
-    print("\nScanning stocks... (this may take a few minutes)")
-    print("Progress: [", end="", flush=True)
-
-    # Progress tracking - OLD
-    # total_tickers = len(tickers)
-    # progress_interval = max(1, total_tickers // 50)  # Show 50 progress marks max
-
-    for ticker in tqdm.tqdm(tickers, desc="Progress", ncols=80):
-        # Show progress - old style
-        # if i % progress_interval == 0:
-        #    print("█", end="", flush=True)
-
-        # Analyze ticker
-        result = analyze_ticker_for_scanner(ticker, timeframe, days)
-
+    for result in analyses:
         if result:
             successful_scans += 1
 
@@ -246,7 +425,16 @@ def scanner_mode(timeframe, days):
         else:
             failed_scans += 1
 
-    # print("]")  # Close progress bar - old style
+    # Market caps are only needed to sort the matches, so look them up for
+    # those alone, reusing today's cached values
+    market_caps = load_market_caps()
+    to_fetch = [r["ticker"] for r in results if r["ticker"] not in market_caps]
+    if to_fetch:
+        market_caps.update(fetch_market_caps(to_fetch))
+        save_market_caps(market_caps)
+
+    for result in results:
+        result["market_cap"] = market_caps[result["ticker"]]
 
     # Display results
     print("\nScan Complete!")
@@ -258,16 +446,30 @@ def scanner_mode(timeframe, days):
         print(f"\nNo stocks found with {min_prob}% or higher probability.")
         return
 
-    # Sort by market cap (descending) if market cap data is available
-    results_with_market_cap = [r for r in results if r["market_cap"] > 0]
-    results_without_market_cap = [r for r in results if r["market_cap"] == 0]
+    # Gather the sort keys into one structured array so every ordering below
+    # is a single stable argsort instead of a Python sort over dicts
+    ranking = np.fromiter(
+        (
+            (
+                r["ticker"],
+                r["market_cap"],
+                r["upside_probability"],
+                r["downside_probability"],
+            )
+            for r in results
+        ),
+        dtype=RANKING_DTYPE,
+        count=len(results),
+    )
 
-    if results_with_market_cap:
-        results_with_market_cap.sort(key=lambda x: x["market_cap"], reverse=True)
-        final_results = results_with_market_cap + results_without_market_cap
+    # Sort by market cap (descending) if market cap data is available; a
+    # stable sort keeps stocks without a market cap last, in scan order
+    if (ranking["market_cap"] > 0).any():
+        order = np.argsort(-ranking["market_cap"], kind="stable")
     else:
         # Sort alphabetically if no market cap data
-        final_results = sorted(results, key=lambda x: x["ticker"])
+        order = np.argsort(ranking["ticker"], kind="stable")
+    final_results = [results[i] for i in order]
 
     # Display results
     print(f"\n{'='*100}")
@@ -330,18 +532,16 @@ def scanner_mode(timeframe, days):
     # Show top 10 by highest probability
     print(f"\n{'='*60}")
     if scan_type == "1":
-        top_stocks = sorted(
-            results, key=lambda x: x["upside_probability"], reverse=True
-        )[:10]
+        top = np.argsort(-ranking["upside_probability"], kind="stable")[:10]
+        top_stocks = [results[i] for i in top]
         print("TOP 10 UPSIDE OPPORTUNITIES:")
         for i, stock in enumerate(top_stocks, 1):
             print(
                 f"{i:2d}. {stock['ticker']} - {stock['upside_probability']:.1f}% upside probability"
             )
     elif scan_type == "2":
-        top_stocks = sorted(
-            results, key=lambda x: x["downside_probability"], reverse=True
-        )[:10]
+        top = np.argsort(-ranking["downside_probability"], kind="stable")[:10]
+        top_stocks = [results[i] for i in top]
         print("TOP 10 DOWNSIDE OPPORTUNITIES:")
         for i, stock in enumerate(top_stocks, 1):
             print(
@@ -350,14 +550,11 @@ def scanner_mode(timeframe, days):
     else:  # Both
         print("TOP 10 HIGHEST PROBABILITY OPPORTUNITIES:")
         # Sort by highest probability (either upside or downside)
-        for result in results:
-            result["max_probability"] = max(
-                result["upside_probability"], result["downside_probability"]
-            )
-
-        top_stocks = sorted(results, key=lambda x: x["max_probability"], reverse=True)[
-            :10
-        ]
+        max_probability = np.maximum(
+            ranking["upside_probability"], ranking["downside_probability"]
+        )
+        top = np.argsort(-max_probability, kind="stable")[:10]
+        top_stocks = [results[i] for i in top]
         for i, stock in enumerate(top_stocks, 1):
             if stock["upside_probability"] > stock["downside_probability"]:
                 print(
@@ -367,165 +564,3 @@ def scanner_mode(timeframe, days):
                 print(
                     f"{i:2d}. {stock['ticker']} - {stock['downside_probability']:.1f}% downside probability"
                 )
-
-    #### Main analysis function for a given ticker with specified timeframe and days.
-    """
-    print(f"\n{'='*60}")
-    print(f"ANALYZING {ticker.upper()} - {timeframe.upper()} TIMEFRAME")
-    print(f"{'='*60}")
-    
-    try:
-        # Download data
-        stock = yf.Ticker(ticker)
-        
-        # Calculate period string for yfinance
-        if days <= 5:
-            period_str = f"{days}d"
-        elif days <= 365:
-            period_str = f"{days}d"
-        else:
-            # For longer periods, use years
-            years = max(1, days // 365)
-            period_str = f"{years}y"
-        
-        print(f"Downloading {days} days of {timeframe} data for {ticker.upper()}...")
-        
-        # Download with specified interval
-        data = stock.history(period=period_str, interval=timeframe)
-        
-        if data.empty:
-            print(f"Error: No data returned for {ticker} with {timeframe} timeframe")
-            print("This might be due to:")
-            print("- Invalid ticker symbol")
-            print("- Timeframe limitations (try fewer days or different timeframe)")
-            print("- Market hours (intraday data only available during trading hours)")
-            return
-        
-        if len(data) < 10:
-            print(f"Warning: Only {len(data)} data points loaded. Need at least 10 for meaningful analysis.")
-            return
-        
-        closes = data['Close'].values
-        print(f"Successfully loaded {len(closes)} data points")
-        
-        # Show data range
-        start_date = data.index[0].strftime('%Y-%m-%d %H:%M') if timeframe != '1d' else data.index[0].strftime('%Y-%m-%d')
-        end_date = data.index[-1].strftime('%Y-%m-%d %H:%M') if timeframe != '1d' else data.index[-1].strftime('%Y-%m-%d')
-        print(f"Data range: {start_date} to {end_date}")
-        
-        # Get consecutive streaks
-        up_streaks, down_streaks = get_consecutive_streaks(closes)
-        
-        print(f"\nHistorical Streak Analysis:")
-        print(f"Total up streaks found: {len(up_streaks)}")
-        print(f"Total down streaks found: {len(down_streaks)}")
-        
-        if up_streaks:
-            print(f"Longest up streak: {max(up_streaks)} periods")
-            print(f"Average up streak: {sum(up_streaks)/len(up_streaks):.1f} periods")
-        
-        if down_streaks:
-            print(f"Longest down streak: {max(down_streaks)} periods")
-            print(f"Average down streak: {sum(down_streaks)/len(down_streaks):.1f} periods")
-        
-        # Get current streak
-        current_length, current_direction = get_current_streak(closes)
-        
-        print(f"\nCurrent Status:")
-        print(f"Current streak: {current_length} consecutive {current_direction} period(s)")
-        print(f"Last close: ${closes[-1]:.2f}")
-        
-        if len(closes) >= 2:
-            print(f"Previous close: ${closes[-2]:.2f}")
-            change = ((closes[-1] - closes[-2]) / closes[-2]) * 100
-            print(f"Last period change: {change:+.2f}%")
-        
-        # Calculate probabilities for next close
-        print(f"\n{'='*60}")
-        print("NEXT CLOSE PROBABILITIES")
-        print(f"{'='*60}")
-        
-        if current_direction == 'up':
-            extend_prob = calculate_streak_probabilities(up_streaks, current_length)
-            break_prob = 100 - extend_prob
-            
-            print(f"Probability of extending up streak to {current_length + 1} periods: {extend_prob:.1f}%")
-            print(f"Probability of breaking up streak: {break_prob:.1f}%")
-            
-            next_upside_prob = extend_prob
-            next_downside_prob = break_prob
-            
-        else:  # current_direction == 'down'
-            extend_prob = calculate_streak_probabilities(down_streaks, current_length)
-            break_prob = 100 - extend_prob
-            
-            print(f"Probability of extending down streak to {current_length + 1} periods: {extend_prob:.1f}%")
-            print(f"Probability of breaking down streak: {break_prob:.1f}%")
-            
-            next_upside_prob = break_prob
-            next_downside_prob = extend_prob
-        
-        print(f"\nSUMMARY - Next Period Close:")
-        print(f"Upside probability: {next_upside_prob:.1f}%")
-        print(f"Downside probability: {next_downside_prob:.1f}%")
-        
-        # Calculate probabilities for the close after next
-        print(f"\n{'='*60}")
-        print("PERIOD AFTER NEXT PROBABILITIES")
-        print(f"{'='*60}")
-        
-        # Scenario 1: Next close is up (extending current streak)
-        if current_direction == 'up':
-            # We would have current_length + 1 consecutive up periods
-            # Now calculate probability of extending to current_length + 2
-            extended_length = current_length + 1
-            scenario1_up = calculate_streak_probabilities(up_streaks, extended_length)
-            scenario1_down = 100 - scenario1_up
-        else:
-            # We're breaking a down streak with an up period
-            # Now calculate probability of extending this new up streak to 2 periods
-            scenario1_up = calculate_streak_probabilities(up_streaks, 1)
-            scenario1_down = 100 - scenario1_up
-        
-        # Scenario 2: Next close is down (extending current streak if down, or breaking if up)
-        if current_direction == 'down':
-            # We would have current_length + 1 consecutive down periods
-            # Now calculate probability of extending to current_length + 2
-            extended_length = current_length + 1
-            scenario2_down = calculate_streak_probabilities(down_streaks, extended_length)
-            scenario2_up = 100 - scenario2_down
-        else:
-            # We're breaking an up streak with a down period
-            # Now calculate probability of extending this new down streak to 2 periods
-            scenario2_down = calculate_streak_probabilities(down_streaks, 1)
-            scenario2_up = 100 - scenario2_down
-        
-        print(f"If next close is ABOVE current:")
-        print(f"  └─ Period after: {scenario1_up:.1f}% up, {scenario1_down:.1f}% down")
-        
-        print(f"If next close is BELOW current:")
-        print(f"  └─ Period after: {scenario2_up:.1f}% up, {scenario2_down:.1f}% down")
-        
-        # Show some streak distribution for context
-        print(f"\n{'='*60}")
-        print("STREAK DISTRIBUTION (Historical)")
-        print(f"{'='*60}")
-        
-        up_counter = Counter(up_streaks)
-        down_counter = Counter(down_streaks)
-        
-        print("Up streaks:")
-        for length in sorted(up_counter.keys())[:10]:  # Show first 10
-            count = up_counter[length]
-            percentage = (count / len(up_streaks)) * 100
-            print(f"  {length} period(s): {count} times ({percentage:.1f}%)")
-        
-        print("\nDown streaks:")
-        for length in sorted(down_counter.keys())[:10]:  # Show first 10
-            count = down_counter[length]
-            percentage = (count / len(down_streaks)) * 100
-            print(f"  {length} period(s): {count} times ({percentage:.1f}%)")
-        
-    except Exception as e:
-        print(f"Error analyzing {ticker}: {str(e)}")
-    """
@@ -1,39 +1,155 @@
 # UTILITY FILE
 
+import functools
+
+import numpy as np
+
+from stock_probability_analyzer._njit import HAVE_NUMBA
+from stock_probability_analyzer.utils_numba import (
+    AOT_STREAKS,
+    scan_kernel,
+    streaks_kernel,
+)
+
+
+def _sign_change_indices(up):
+    """
+    Return the indices i where up[i] differs from up[i - 1].
+    Comparing the boolean mask against itself shifted by one period keeps the
+    whole search branch-free, and flatnonzero on the resulting bool array is
+    a single vectorized pass.
+    """
+    return np.flatnonzero(up[1:] != up[:-1]) + 1
+
+
+def _run_length_encode(closes):
+    """
+    Run-length encode the close-to-close moves.
+    Returns (run_lengths, run_is_up) where run_is_up is True for up runs and
+    False for down runs (equal closes count as down).
+    """
+    up = np.diff(closes) > 0
+
+    # Runs start at index 0 and wherever the direction changes
+    change_idx = _sign_change_indices(up)
+    boundaries = np.concatenate(([0], change_idx, [len(up)]))
+    run_lengths = np.diff(boundaries)
+    run_is_up = up[boundaries[:-1]]
+
+    return run_lengths, run_is_up
+
+
+def _streak_dtype(n):
+    """
+    Smallest integer dtype that holds any streak length in n closes.
+    Streaks are short, so int16 almost always fits and keeps the arrays small.
+    """
+    return np.int16 if n <= np.iinfo(np.int16).max else np.int32
+
+
+def _streaks_compiled(closes):
+    """
+    Run streaks_kernel over freshly allocated buffers, preferring the
+    ahead-of-time build when it covers these dtypes.
+    Returns (up_streaks, down_streaks, current_length, current_is_up).
+    """
+    dtype = np.dtype(_streak_dtype(len(closes)))
+    kernel = AOT_STREAKS.get((closes.dtype, dtype))
+    if kernel is None:
+        if not HAVE_NUMBA:
+            return _streaks_numpy(closes)
+        kernel = streaks_kernel
+
+    # Up and down runs alternate, so neither side can hold more than half
+    up_streaks = np.empty(len(closes) // 2 + 1, dtype=dtype)
+    down_streaks = np.empty(len(closes) // 2 + 1, dtype=dtype)
+
+    n_up, n_down, current_length, current_is_up = kernel(
+        closes, up_streaks, down_streaks
+    )
+
+    return up_streaks[:n_up], down_streaks[:n_down], current_length, current_is_up
+
+
+def _streaks_numpy(closes):
+    """
+    Vectorized equivalent of _streaks_compiled, used when numba is unavailable.
+    """
+    run_lengths, run_is_up = _run_length_encode(closes)
+    run_lengths = run_lengths.astype(_streak_dtype(len(closes)))
+    return (
+        run_lengths[run_is_up],
+        run_lengths[~run_is_up],
+        int(run_lengths[-1]),
+        bool(run_is_up[-1]),
+    )
+
+
+_streaks = _streaks_compiled if HAVE_NUMBA or AOT_STREAKS else _streaks_numpy
 
 
 def get_consecutive_streaks(closes):
     """
     Analyze consecutive up/down moves in closing prices.
-    Returns dictionaries with streak lengths and their frequencies.
-    """
-    up_streaks = []
-    down_streaks = []
-
-    current_up_streak = 0
-    current_down_streak = 0
-
-    for i in range(1, len(closes)):
-        if closes[i] > closes[i - 1]:  # Up day
-            current_up_streak += 1
-            if current_down_streak > 0:
-                down_streaks.append(current_down_streak)
-                current_down_streak = 0
-        else:  # Down day (or equal)
-            current_down_streak += 1
-            if current_up_streak > 0:
-                up_streaks.append(current_up_streak)
-                current_up_streak = 0
-
-    # Don't forget the last streak if it's still active
-    if current_up_streak > 0:
-        up_streaks.append(current_up_streak)
-    if current_down_streak > 0:
-        down_streaks.append(current_down_streak)
+    Returns (up_streaks, down_streaks) as integer arrays of streak lengths,
+    int16 unless the history is long enough for a streak to overflow it.
+
+    Runs as a compiled single pass when numba is installed, otherwise as a
+    run-length encoding in a handful of vectorized NumPy passes.
+    """
+    closes = np.ascontiguousarray(closes)
+    if len(closes) < 2:
+        return np.empty(0, dtype=np.int16), np.empty(0, dtype=np.int16)
+
+    up_streaks, down_streaks, _, _ = _streaks(closes)
 
     return up_streaks, down_streaks
 
 
+def analyze_closes(closes):
+    """
+    Single-pass combination of get_consecutive_streaks and get_current_streak.
+    Returns (up_streaks, down_streaks, current_length, current_direction).
+    The last run of the encoding is the current streak, so the close array
+    is only traversed once.
+
+    Closes are compared as float64, so small moves on large prices classify
+    the same way as in get_consecutive_streaks and get_current_streak.
+    """
+    closes = np.ascontiguousarray(closes, dtype=np.float64)
+    if len(closes) < 2:
+        current_length, current_direction = get_current_streak(closes)
+        return (
+            np.empty(0, dtype=np.int16),
+            np.empty(0, dtype=np.int16),
+            current_length,
+            current_direction,
+        )
+
+    up_streaks, down_streaks, current_length, current_is_up = _streaks(closes)
+    current_direction = "up" if current_is_up else "down"
+
+    return (
+        up_streaks,
+        down_streaks,
+        int(current_length),
+        current_direction,
+    )
+
+
+def _current_run(up):
+    """
+    Length and direction of the trailing run of a non-empty up/down mask.
+    Returns (run_length, run_is_up).
+    """
+    last_up = bool(up[-1])
+
+    # Count the trailing moves that match the last one: argmin finds the
+    # first mismatch from the end, and is 0 when every move matches
+    same = up[::-1] == last_up
+    return int(np.argmin(same)) or len(same), last_up
+
+
 def get_current_streak(closes):
     """
     Determine the current consecutive streak and its direction.
@@ -42,45 +158,206 @@ def get_current_streak(closes):
     if len(closes) < 2:
         return 0, "none"
 
-    current_streak = 1
-    if closes[-1] > closes[-2]:
-        direction = "up"
-        for i in range(len(closes) - 2, 0, -1):
-            if closes[i] > closes[i - 1]:
-                current_streak += 1
-            else:
-                break
-    else:
-        direction = "down"
-        for i in range(len(closes) - 2, 0, -1):
-            if closes[i] <= closes[i - 1]:
-                current_streak += 1
-            else:
-                break
+    up = np.diff(np.asarray(closes)) > 0  # Equal closes count as down
+    current_streak, current_is_up = _current_run(up)
+
+    return current_streak, "up" if current_is_up else "down"
 
-    return current_streak, direction
+
+def build_histogram(streaks):
+    """
+    Count the streaks by length: hist[k] is the number of streaks that lasted
+    exactly k periods.
+    """
+    return np.bincount(np.asarray(streaks, dtype=np.int64))
 
 
-def calculate_streak_probabilities(streaks, current_length):
+def build_survival(streaks, hist=None):
+    """
+    Build the survival (reverse cumulative) count array for a list of streaks.
+    surv[k] is the number of streaks that lasted at least k periods, so a
+    probability query for any length becomes a constant-time lookup.
+    Pass the histogram from build_histogram as hist to skip recounting.
+    """
+    if hist is None:
+        hist = build_histogram(streaks)
+    return np.cumsum(hist[::-1])[::-1]
+
+
+def calculate_streak_probabilities(surv, current_length):
     """
     Calculate probability of extending a streak of given length.
     This properly accounts for the fact that longer streaks contain evidence
     of all intermediate lengths (e.g., a 10-day streak reached 8 and 9 days).
-    """
-    if not streaks:
-        return 0.0
 
+    Takes the survival array from build_survival rather than the raw streaks.
+    """
     # Count opportunities: how many times historically did we reach current_length?
     # A streak of length N provides evidence for reaching lengths 1, 2, 3, ..., N
-    opportunities_at_current_length = sum(
-        1 for streak in streaks if streak >= current_length
+    opportunities_at_current_length = (
+        surv[current_length] if current_length < len(surv) else 0
     )
 
     # Count extensions: how many times did we extend beyond current_length?
     # A streak of length N shows extension beyond lengths 1, 2, 3, ..., N-1
-    extended_count = sum(1 for streak in streaks if streak > current_length)
+    extended_count = surv[current_length + 1] if current_length + 1 < len(surv) else 0
 
     if opportunities_at_current_length == 0:
         return 0.0
 
-    return (extended_count / opportunities_at_current_length) * 100
+    return float(extended_count / opportunities_at_current_length) * 100
+
+
+def batch_streak_probabilities(streak_arrays, current_lengths):
+    """
+    calculate_streak_probabilities for many tickers in one call.
+    streak_arrays holds each ticker's streaks in its current direction and
+    current_lengths the matching current streak lengths. The streaks are
+    padded with -1 into one matrix, so the whole batch is a couple of
+    vectorized comparisons.
+    Returns a float64 array of extension probabilities in percent.
+    """
+    width = max((len(streaks) for streaks in streak_arrays), default=0)
+    dtype = np.result_type(np.int16, *streak_arrays)
+    streaks_matrix = np.full((len(streak_arrays), width), -1, dtype=dtype)
+    for i, streaks in enumerate(streak_arrays):
+        streaks_matrix[i, : len(streaks)] = streaks
+
+    # Padding is -1, so it never counts as reaching a length
+    lengths = np.asarray(current_lengths, dtype=np.int64)[:, None]
+    opportunities = (streaks_matrix >= lengths).sum(axis=1)
+    extended = (streaks_matrix > lengths).sum(axis=1)
+
+    probabilities = np.divide(
+        extended,
+        opportunities,
+        out=np.zeros(len(opportunities)),
+        where=opportunities > 0,
+    )
+    return probabilities * 100
+
+
+def _scan_numpy(closes_arrays):
+    """
+    Per-ticker analyze_closes plus one batch_streak_probabilities call; the
+    fallback for scan_streak_probabilities when numba is unavailable.
+    """
+    n_tickers = len(closes_arrays)
+    current_lengths = np.zeros(n_tickers, dtype=np.int64)
+    current_is_up = np.zeros(n_tickers, dtype=bool)
+    has_both = np.zeros(n_tickers, dtype=bool)
+    streak_arrays = []
+
+    for i, closes in enumerate(closes_arrays):
+        up_streaks, down_streaks, current_length, current_direction = analyze_closes(
+            closes
+        )
+        current_lengths[i] = current_length
+        current_is_up[i] = current_direction == "up"
+        has_both[i] = up_streaks.size > 0 and down_streaks.size > 0
+        streak_arrays.append(up_streaks if current_is_up[i] else down_streaks)
+
+    extend_probs = batch_streak_probabilities(streak_arrays, current_lengths)
+
+    return current_lengths, current_is_up, extend_probs, has_both
+
+
+def scan_streak_probabilities(closes_arrays):
+    """
+    Current streak and next-period extension probability for many tickers.
+    Returns (current_lengths, current_is_up, extend_probs, has_both) as
+    arrays aligned with closes_arrays; has_both is False where a ticker has
+    no up streak or no down streak to compare against.
+
+    With numba installed the closes are laid end to end and every ticker is
+    analyzed in one parallel kernel call, without allocating any streaks.
+    """
+    if not HAVE_NUMBA:
+        return _scan_numpy(closes_arrays)
+
+    # Compare as float64, like analyze_closes
+    lengths = np.fromiter(
+        (len(closes) for closes in closes_arrays),
+        dtype=np.int64,
+        count=len(closes_arrays),
+    )
+    offsets = np.concatenate(([0], np.cumsum(lengths)))
+    closes = np.empty(offsets[-1], dtype=np.float64)
+    for i, ticker_closes in enumerate(closes_arrays):
+        closes[offsets[i] : offsets[i + 1]] = ticker_closes
+
+    return scan_kernel(closes, offsets)
+
+
+def warm_up():
+    """
+    Load (or compile) the numba kernels by running them on a few closes.
+    Meant to run in a background thread at start-up, so the JIT cost overlaps
+    with the user typing instead of landing on the first analysis.
+    """
+    if not HAVE_NUMBA:
+        return
+
+    # Read-only like the arrays download_history returns, since numba
+    # compiles a separate specialization for read-only inputs
+    closes = np.array([1.0, 2.0, 1.0, 3.0, 3.0])
+    closes.flags.writeable = False
+    analyze_closes(closes)
+    scan_streak_probabilities([closes])
+
+
+def build_transition_matrix(up_surv, down_surv, up_length, down_length):
+    """
+    Build the 2x2 next-period transition matrix over the states (up, down).
+    Row 0 is the chance of the next close being up/down while in an up streak
+    of up_length periods; row 1 is the same for a down streak of down_length.
+    """
+    p_up_up = calculate_streak_probabilities(up_surv, up_length) / 100
+    p_down_down = calculate_streak_probabilities(down_surv, down_length) / 100
+
+    return np.array(
+        [
+            [p_up_up, 1 - p_up_up],
+            [1 - p_down_down, p_down_down],
+        ]
+    )
+
+
+def estimate_transition_matrix(up_streaks, down_streaks, current_direction):
+    """
+    Maximum-likelihood first-order transition matrix over the states (up, down).
+    The counts come straight from the streak lengths: a streak of N periods
+    holds N - 1 same-direction transitions and ends in one reversal, except
+    for the still-active current streak. Rows without data default to 50/50.
+    """
+    up_streaks = np.asarray(up_streaks)
+    down_streaks = np.asarray(down_streaks)
+
+    up_to_up = up_streaks.sum() - len(up_streaks)
+    up_to_down = len(up_streaks) - (1 if current_direction == "up" else 0)
+    down_to_down = down_streaks.sum() - len(down_streaks)
+    down_to_up = len(down_streaks) - (1 if current_direction == "down" else 0)
+
+    counts = np.array(
+        [
+            [up_to_up, up_to_down],
+            [down_to_up, down_to_down],
+        ],
+        dtype=np.float64,
+    )
+    totals = counts.sum(axis=1, keepdims=True)
+
+    return np.divide(counts, totals, out=np.full_like(counts, 0.5), where=totals > 0)
+
+
+@functools.cache
+def get_period_string(days):
+    """
+    Convert a number of days into a yfinance period string.
+    """
+    if days <= 365:
+        return f"{days}d"
+    else:
+        # For longer periods, use years
+        years = max(1, days // 365)
+        return f"{years}y"
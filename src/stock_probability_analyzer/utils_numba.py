@@ -0,0 +1,120 @@
+# NUMBA KERNELS
+# Compiled when numba is installed; utils falls back to NumPy otherwise.
+# streaks_kernel can also be built ahead of time, see build_aot.py.
+
+import numpy as np
+
+from stock_probability_analyzer._njit import njit, prange
+
+try:
+    from stock_probability_analyzer import _streaks_aot
+except ImportError:  # Only present after running build_aot
+    _streaks_aot = None
+
+# Ahead-of-time compiled streaks_kernel, keyed by (closes dtype, streak dtype)
+AOT_STREAKS = {}
+if _streaks_aot is not None:
+    AOT_STREAKS = {
+        (np.dtype(np.float64), np.dtype(np.int16)): _streaks_aot.streaks_f8_i2,
+        (np.dtype(np.float64), np.dtype(np.int32)): _streaks_aot.streaks_f8_i4,
+    }
+
+
+@njit(cache=True, boundscheck=False)
+def streaks_kernel(closes, up_streaks, down_streaks):
+    """
+    Fused single-pass streak scan behind get_consecutive_streaks.
+    Writes the streak lengths into the preallocated up_streaks/down_streaks
+    buffers and returns (n_up, n_down, current_length, current_is_up).
+    """
+    n = len(closes)
+    n_up = 0
+    n_down = 0
+
+    run_length = 0
+    run_is_up = closes[1] > closes[0]
+    for i in range(1, n):
+        is_up = closes[i] > closes[i - 1]  # Equal closes count as down
+        if is_up == run_is_up:
+            run_length += 1
+        else:
+            if run_is_up:
+                up_streaks[n_up] = run_length
+                n_up += 1
+            else:
+                down_streaks[n_down] = run_length
+                n_down += 1
+            run_is_up = is_up
+            run_length = 1
+
+    # The last run is still active, and is the current streak
+    if run_is_up:
+        up_streaks[n_up] = run_length
+        n_up += 1
+    else:
+        down_streaks[n_down] = run_length
+        n_down += 1
+
+    return n_up, n_down, run_length, run_is_up
+
+
+@njit(cache=True, parallel=True)
+def scan_kernel(closes, offsets):
+    """
+    Compiled body of utils.scan_streak_probabilities; the tickers run in
+    parallel. closes holds every ticker's closes back to back, ticker i
+    spanning closes[offsets[i]:offsets[i + 1]].
+    Returns (current_lengths, current_is_up, extend_probs, has_both), where
+    has_both is False for tickers without both an up and a down streak.
+    """
+    n_tickers = len(offsets) - 1
+    current_lengths = np.zeros(n_tickers, dtype=np.int64)
+    current_is_up = np.zeros(n_tickers, dtype=np.bool_)
+    extend_probs = np.zeros(n_tickers)
+    has_both = np.zeros(n_tickers, dtype=np.bool_)
+
+    for i in prange(n_tickers):
+        start = offsets[i]
+        end = offsets[i + 1]
+        if end - start < 2:
+            continue
+
+        # Walk back from the last move to find the current streak
+        last_up = closes[end - 1] > closes[end - 2]  # Equal closes count as down
+        length = 1
+        j = end - 2
+        while j > start and (closes[j] > closes[j - 1]) == last_up:
+            length += 1
+            j -= 1
+
+        # Walk forward over the runs, counting those in the current direction
+        # that reached the current length and those that went beyond it. The
+        # current streak itself is the last run.
+        n_up = 0
+        n_down = 0
+        opportunities = 0
+        extended = 0
+        run_length = 0
+        run_is_up = closes[start + 1] > closes[start]
+        for k in range(start + 1, end + 1):
+            is_up = k < end and closes[k] > closes[k - 1]
+            if k < end and is_up == run_is_up:
+                run_length += 1
+                continue
+
+            if run_is_up:
+                n_up += 1
+            else:
+                n_down += 1
+            if run_is_up == last_up:
+                opportunities += np.int64(run_length >= length)
+                extended += np.int64(run_length > length)
+            run_is_up = is_up
+            run_length = 1
+
+        current_lengths[i] = length
+        current_is_up[i] = last_up
+        has_both[i] = n_up > 0 and n_down > 0
+        extend_probs[i] = extended / opportunities * 100
+
+    return current_lengths, current_is_up, extend_probs, has_both
@@ -0,0 +1,114 @@
+import time
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from stock_probability_analyzer import cache, scanner
+from stock_probability_analyzer.utils import get_period_string
+
+DAYS = 30
+PERIOD = get_period_string(DAYS)
+BARS = pd.date_range("2024-01-02 14:30", periods=4, freq="h", tz="UTC")
+
+
+class FakeDownloads:
+    """
+    Stand-in for download_close_series that records every call and serves
+    the Close series in responses, keyed by ticker.
+    """
+
+    def __init__(self, responses):
+        self.responses = responses
+        self.calls = []
+
+    def __call__(self, tickers, chunk_size=50, **download_kwargs):
+        self.calls.append((list(tickers), download_kwargs))
+        return {t: self.responses[t] for t in tickers if t in self.responses}
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "CACHE_DIR", tmp_path)
+    return tmp_path
+
+
+def write_cached(ticker, timeframe, timestamps, closes, saved_at):
+    path = cache.cache_path(ticker, timeframe, PERIOD)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    np.savez(path, timestamps=timestamps, closes=closes, saved_at=saved_at)
+
+
+def freeze_today(monkeypatch, timestamp):
+    """
+    Make scanner's date.today() the day of timestamp, so an entry saved an
+    hour earlier still counts as saved today when the test runs after
+    midnight.
+    """
+
+    class FrozenDate(date):
+        @classmethod
+        def today(cls):
+            return date.fromtimestamp(timestamp)
+
+    monkeypatch.setattr(scanner, "date", FrozenDate)
+
+
+def test_stale_entry_replaces_its_last_bar(cache_dir, monkeypatch):
+    saved_at = time.time() - 3600
+    freeze_today(monkeypatch, saved_at)
+    timestamps = scanner.utc_timestamps(BARS[:3])
+    write_cached("AAA", "1h", timestamps, np.array([1.0, 2.0, 3.0]), saved_at)
+
+    # The last cached bar was incomplete, so the update starts with it again
+    downloads = FakeDownloads({"AAA": pd.Series([3.5, 4.0], index=BARS[2:])})
+    monkeypatch.setattr(scanner, "download_close_series", downloads)
+
+    closes_by_ticker = scanner.fetch_all_closes(["AAA"], "1h", DAYS)
+
+    np.testing.assert_array_equal(closes_by_ticker["AAA"], [1.0, 2.0, 3.5, 4.0])
+    assert downloads.calls[-1][1]["start"] == pd.Timestamp(BARS[2])
+
+    saved_timestamps, saved_closes, _ = cache.load_closes("AAA", "1h", PERIOD)
+    np.testing.assert_array_equal(saved_timestamps, scanner.utc_timestamps(BARS))
+    np.testing.assert_array_equal(saved_closes, [1.0, 2.0, 3.5, 4.0])
+
+
+def test_fresh_entry_skips_the_download(cache_dir, monkeypatch):
+    timestamps = scanner.utc_timestamps(BARS)
+    write_cached("AAA", "1h", timestamps, np.array([1.0, 2.0, 3.0, 4.0]), time.time())
+
+    downloads = FakeDownloads({})
+    monkeypatch.setattr(scanner, "download_close_series", downloads)
+
+    closes_by_ticker = scanner.fetch_all_closes(["AAA"], "1h", DAYS)
+
+    np.testing.assert_array_equal(closes_by_ticker["AAA"], [1.0, 2.0, 3.0, 4.0])
+    assert all(tickers == [] for tickers, _ in downloads.calls)
+
+
+def test_entry_from_an_earlier_day_is_refetched_in_full(cache_dir, monkeypatch):
+    timestamps = scanner.utc_timestamps(BARS[:3])
+    saved_at = time.time() - 2 * 86400
+    write_cached("AAA", "1h", timestamps, np.array([1.0, 2.0, 3.0]), saved_at)
+
+    downloads = FakeDownloads({"AAA": pd.Series([5.0, 6.0, 7.0, 8.0], index=BARS)})
+    monkeypatch.setattr(scanner, "download_close_series", downloads)
+
+    closes_by_ticker = scanner.fetch_all_closes(["AAA"], "1h", DAYS)
+
+    np.testing.assert_array_equal(closes_by_ticker["AAA"], [5.0, 6.0, 7.0, 8.0])
+    assert downloads.calls == [(["AAA"], {"period": PERIOD, "interval": "1h"})]
+
+
+def test_one_minute_data_is_never_cached(cache_dir, monkeypatch):
+    bars = pd.date_range("2024-01-02 14:30", periods=3, freq="min", tz="UTC")
+    downloads = FakeDownloads({"AAA": pd.Series([1.0, 2.0, 3.0], index=bars)})
+    monkeypatch.setattr(scanner, "download_close_series", downloads)
+
+    scanner.fetch_all_closes(["AAA"], "1m", DAYS)
+    scanner.fetch_all_closes(["AAA"], "1m", DAYS)
+
+    assert [tickers for tickers, _ in downloads.calls] == [["AAA"], ["AAA"]]
+    assert not any(cache_dir.rglob("*.npz"))
@@ -0,0 +1,38 @@
+import numpy as np
+
+from stock_probability_analyzer.utils import analyze_closes, estimate_transition_matrix
+
+
+def markov_matrix(closes):
+    up_streaks, down_streaks, _, current_direction = analyze_closes(closes)
+    return estimate_transition_matrix(up_streaks, down_streaks, current_direction)
+
+
+def test_matches_counted_transitions():
+    rng = np.random.default_rng(0)
+    closes = rng.integers(95, 105, size=500).astype(np.float64)
+
+    # Count (previous move, next move) pairs directly; equal closes are down
+    moves = np.where(closes[1:] > closes[:-1], 0, 1)
+    counts = np.zeros((2, 2))
+    np.add.at(counts, (moves[:-1], moves[1:]), 1)
+    expected = counts / counts.sum(axis=1, keepdims=True)
+
+    matrix = markov_matrix(closes)
+
+    np.testing.assert_allclose(matrix, expected)
+    np.testing.assert_allclose(matrix.sum(axis=1), [1, 1])
+
+
+def test_equal_closes_count_as_down():
+    # Moves: up, down (equal close), up
+    matrix = markov_matrix(np.array([1.0, 2.0, 2.0, 3.0]))
+
+    np.testing.assert_allclose(matrix, [[0, 1], [1, 0]])
+
+
+def test_no_up_streaks_defaults_the_up_row():
+    # Every move is down, the last one through an equal close
+    matrix = markov_matrix(np.array([5.0, 4.0, 3.0, 3.0]))
+
+    np.testing.assert_allclose(matrix, [[0.5, 0.5], [0, 1]])
@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+
+from stock_probability_analyzer.utils import (
+    analyze_closes,
+    build_survival,
+    calculate_streak_probabilities,
+    get_consecutive_streaks,
+    get_current_streak,
+    scan_streak_probabilities,
+)
+from stock_probability_analyzer.utils_numba import scan_kernel
+
+
+def reference_scan(closes):
+    """
+    Scanner result for one ticker, built from the single-ticker helpers.
+    """
+    up_streaks, down_streaks, current_length, current_direction = analyze_closes(closes)
+    is_up = current_direction == "up"
+    surv = build_survival(up_streaks if is_up else down_streaks)
+    probability = calculate_streak_probabilities(surv, current_length)
+    has_both = up_streaks.size > 0 and down_streaks.size > 0
+    return current_length, is_up, probability, has_both
+
+
+def random_closes(rng, n):
+    # Few distinct prices, so equal closes and long streaks both show up
+    return rng.integers(95, 105, size=n).astype(np.float64)
+
+
+CLOSES_CASES = [
+    [1.0, 2.0],
+    [2.0, 1.0],
+    [1.0, 1.0, 1.0],
+    [1.0, 2.0, 3.0, 4.0],
+    [4.0, 3.0, 3.0, 5.0, 6.0, 2.0],
+    [1.0, 2.0, 1.0, 2.0, 1.0, 2.0],
+    [600000.01, 600000.03, 600000.05],
+]
+
+
+def check_parity(closes_arrays, results):
+    current_lengths, current_is_up, extend_probs, has_both = results
+    for i, closes in enumerate(closes_arrays):
+        expected = reference_scan(closes)
+        assert current_lengths[i] == expected[0]
+        assert current_is_up[i] == expected[1]
+        assert extend_probs[i] == pytest.approx(expected[2])
+        assert has_both[i] == expected[3]
+
+
+@pytest.mark.parametrize("closes", CLOSES_CASES)
+def test_scan_kernel_matches_single_ticker_helpers(closes):
+    closes = np.array(closes)
+    offsets = np.array([0, len(closes)], dtype=np.int64)
+    check_parity([closes], scan_kernel(closes, offsets))
+
+
+def test_scan_matches_single_ticker_helpers_on_random_closes():
+    rng = np.random.default_rng(0)
+    closes_arrays = [random_closes(rng, n) for n in rng.integers(2, 300, size=50)]
+
+    offsets = np.concatenate(([0], np.cumsum([len(c) for c in closes_arrays])))
+    check_parity(closes_arrays, scan_kernel(np.concatenate(closes_arrays), offsets))
+    check_parity(closes_arrays, scan_streak_probabilities(closes_arrays))
+
+
+def test_scan_skips_tickers_without_a_move():
+    closes_arrays = [np.array([]), np.array([100.0]), np.array([1.0, 2.0, 1.0])]
+
+    current_lengths, _, extend_probs, has_both = scan_streak_probabilities(
+        closes_arrays
+    )
+
+    assert list(has_both) == [False, False, True]
+    assert current_lengths[0] == 0 and current_lengths[1] == 0
+    assert extend_probs[0] == 0 and extend_probs[1] == 0
+
+
+def test_analyze_closes_matches_helpers_on_large_prices():
+    # Moves this small vanish when the closes are rounded to float32
+    closes = np.array([600000.01, 600000.03, 600000.05, 600000.04])
+
+    up_streaks, down_streaks, current_length, current_direction = analyze_closes(closes)
+
+    expected_up, expected_down = get_consecutive_streaks(closes)
+    assert list(up_streaks) == list(expected_up) == [2]
+    assert list(down_streaks) == list(expected_down) == [1]
+    assert (current_length, current_direction) == get_current_streak(closes)
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from stock_probability_analyzer import main
+
+# Moves: up, up, down, up, up, up, down, down, up, up
+# Up streaks [2, 3, 2], down streaks [1, 2]; the current streak is 2 up
+UP_CLOSES = [10.0, 11.0, 12.0, 11.0, 12.0, 13.0, 14.0, 13.0, 12.0, 13.0, 14.0]
+
+# One more down close: up streaks [2, 3, 2], down streaks [1, 2, 1]; the
+# current streak is 1 down
+DOWN_CLOSES = UP_CLOSES + [13.0]
+
+
+@pytest.fixture
+def analyze(monkeypatch):
+    """
+    Run compute_streak_analysis on a fixed close series instead of a download.
+    """
+
+    def run(closes):
+        closes = np.array(closes)
+        monkeypatch.setattr(
+            main, "download_history", lambda *args: (closes, None, None)
+        )
+        main.compute_streak_analysis.cache_clear()
+        return main.compute_streak_analysis("TEST", "1d", "30d", "test")
+
+    yield run
+    main.compute_streak_analysis.cache_clear()
+
+
+def test_next_period_during_an_up_streak(analyze):
+    analysis = analyze(UP_CLOSES)
+
+    # 3 up streaks reached 2 periods and 1 of them went on to a third
+    next_probs = analysis.state @ analysis.next_matrix * 100
+    np.testing.assert_allclose(next_probs, [100 / 3, 200 / 3])
+
+
+def test_period_after_next_during_an_up_streak(analyze):
+    analysis = analyze(UP_CLOSES)
+
+    # Up next: no up streak ever went beyond 3 periods
+    np.testing.assert_allclose(analysis.after_matrix[0] * 100, [0, 100])
+    # Down next: 1 of the 2 down streaks went beyond 1 period
+    np.testing.assert_allclose(analysis.after_matrix[1] * 100, [50, 50])
+
+    after_probs = analysis.state @ analysis.next_matrix @ analysis.after_matrix
+    np.testing.assert_allclose(after_probs * 100, [100 / 3, 200 / 3])
+
+
+def test_next_period_during_a_down_streak(analyze):
+    analysis = analyze(DOWN_CLOSES)
+
+    # 3 down streaks reached 1 period and 1 of them went on to a second
+    next_probs = analysis.state @ analysis.next_matrix * 100
+    np.testing.assert_allclose(next_probs, [200 / 3, 100 / 3])
+
+
+def test_period_after_next_during_a_down_streak(analyze):
+    analysis = analyze(DOWN_CLOSES)
+
+    # Up next: every up streak went beyond 1 period
+    np.testing.assert_allclose(analysis.after_matrix[0] * 100, [100, 0])
+    # Down next: no down streak ever went beyond 2 periods
+    np.testing.assert_allclose(analysis.after_matrix[1] * 100, [100, 0])
+
+    after_probs = analysis.state @ analysis.next_matrix @ analysis.after_matrix
+    np.testing.assert_allclose(after_probs * 100, [100, 0])